@@ -1,202 +1,245 @@
-#!/usr/bin/env python3
-"""
-careerportal_enrich_by_year.py
-
-What it does:
- - Computes targetYear = UTC_current_year - 1 (unless overridden by --year)
- - Loads ./output/<year>/fortune500_<year>.csv (columns: rank,company_name)
- - Queries DuckDuckGo to resolve a company's careers/jobs portal
- - Caches results in ./output/<year>/ddg_cache.json
- - Writes ./output/<year>/fortune500_<year>_with_careers.csv
-
-Usage:
-  # automatic (uses UTC now -> previous year)
-  python careerportal_enrich_by_year.py
-
-  # force a year
-  python careerportal_enrich_by_year.py --year 2024
-
-Requirements:
-  pip install ddgs requests
-"""
-
-import os
-import csv
-import json
-import time
-import argparse
-from datetime import datetime, timezone
-from urllib.parse import urlparse
-
-# Try ddgs first, fallback to duckduckgo_search
-try:
-    from ddgs import DDGS
-except ImportError:
-    try:
-        from duckduckgo_search import DDGS
-    except ImportError:
-        DDGS = None
-
-# Config / tuning
-OUTPUT_ROOT = os.path.join(os.getcwd(), "output")
-DELAY_BETWEEN_REQUESTS = 0.18
-MAX_RESULTS_PER_QUERY = 10
-PREFERRED_KEYWORDS = ("career", "careers", "job", "jobs", "vacancy", "join-us", "talent", "opportunities")
-
-# === NEW: HELPER FUNCTIONS FOR CACHING ===
-def load_cache(path):
-    """Loads the cache file from the given path if it exists."""
-    if os.path.exists(path):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            return {}
-    return {}
-
-def save_cache(path, cache):
-    """Saves the cache dictionary to the given path."""
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(cache, f, ensure_ascii=False, indent=2)
-    except IOError as e:
-        print(f"[WARN] Could not save cache file to {path}: {e}")
-# === END NEW HELPER FUNCTIONS ===
-
-
-# Helpers: year logic
-def compute_target_year(now=None):
-    if now is None:
-        now = datetime.now(timezone.utc)
-    return now.year - 1
-
-def output_dir_for_year(year):
-    return os.path.join(OUTPUT_ROOT, str(year))
-
-def input_csv_for_year(year):
-    return os.path.join(output_dir_for_year(year), f"fortune500_{year}.csv")
-
-def cache_path_for_year(year):
-    return os.path.join(output_dir_for_year(year), "ddg_cache.json")
-
-def output_enriched_csv(year):
-    return os.path.join(output_dir_for_year(year), f"fortune500_{year}_with_careers.csv")
-
-# DDG search wrappers
-def ddg_search_raw(query, max_results=MAX_RESULTS_PER_QUERY):
-    if DDGS is None:
-        raise RuntimeError("No DuckDuckGo client installed. Run: pip install ddgs")
-    try:
-        with DDGS() as ddgs:
-            return list(ddgs.text(query, max_results=max_results))
-    except Exception as e:
-        print(f"[WARN] DuckDuckGo search failed for '{query}': {e}")
-        return []
-
-def normalize_href(r):
-    return (r.get("href") or r.get("url") or "").strip()
-
-def score_and_pick_best(results, company_name):
-    if not results:
-        return ""
-    scored = []
-    token = "".join(ch for ch in company_name if ch.isalnum()).lower()
-
-    for idx, r in enumerate(results):
-        href = normalize_href(r)
-        title = (r.get("title") or "").lower()
-        if not href:
-            continue
-        
-        parsed = urlparse(href)
-        netloc = parsed.netloc.lower()
-        path = parsed.path.lower()
-        score = 0
-
-        for kw in PREFERRED_KEYWORDS:
-            if kw in href or kw in title:
-                score += 60
-        
-        if token and token in netloc:
-            score += 30
-
-        if any(part in netloc for part in ("careers.", "jobs.", "talent.")):
-            score += 40
-            
-        if any(dom in netloc for dom in ("wikipedia.org", "linkedin.com", "facebook.com")):
-            score = 0 # Heavily penalize social/wiki sites
-
-        score -= idx * 2 # Prioritize higher-ranked results
-        scored.append((score, href))
-
-    if not scored:
-        return ""
-        
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return scored[0][1] if scored[0][0] > 0 else ""
-
-def find_career_link(company_name, cache):
-    q = f"{company_name} careers site"
-    if q in cache:
-        return cache[q]
-    
-    results = ddg_search_raw(q, max_results=MAX_RESULTS_PER_QUERY)
-    best = score_and_pick_best(results, company_name)
-    
-    cache[q] = best or ""
-    return best or ""
-
-# Main pipeline
-def main():
-    parser = argparse.ArgumentParser(description="Enrich Fortune500 CSV with careers links (DuckDuckGo).")
-    parser.add_argument("--year", type=int, help="force year (overrides UTC-based target)")
-    args = parser.parse_args()
-
-    target_year = args.year or compute_target_year()
-    in_csv = input_csv_for_year(target_year)
-    out_csv = output_enriched_csv(target_year)
-    cache_file = cache_path_for_year(target_year)
-
-    print(f"Target Year: {target_year}")
-    print(f"Input CSV: {in_csv}")
-
-    if not os.path.exists(in_csv):
-        print(f"[ERR] Input CSV not found. Please run the annual scraper first.")
-        return
-
-    if not DDGS:
-        print("[ERR] No DuckDuckGo client found. Run: pip install ddgs")
-        return
-
-    with open(in_csv, newline="", encoding="utf-8") as fh:
-        reader = csv.DictReader(fh)
-        companies = [row for row in reader if row.get("company_name")]
-
-    cache = load_cache(cache_file)
-    results = []
-
-    try:
-        for idx, row in enumerate(companies, start=1):
-            name = row["company_name"]
-            print(f"[{idx}/{len(companies)}] Resolving: {name}")
-            link = find_career_link(name, cache)
-            print("  ->", link or "(no match)")
-            results.append({"rank": row.get("rank", ""), "company_name": name, "careers_link": link})
-            time.sleep(DELAY_BETWEEN_REQUESTS)
-    except KeyboardInterrupt:
-        print("\nInterrupted. Flushing cache and partial output...")
-    finally:
-        save_cache(cache_file, cache)
-        
-        # Ensure output directory exists
-        os.makedirs(output_dir_for_year(target_year), exist_ok=True)
-        
-        with open(out_csv, "w", newline="", encoding="utf-8") as fh:
-            writer = csv.DictWriter(fh, fieldnames=["rank", "company_name", "careers_link"])
-            writer.writeheader()
-            writer.writerows(results)
-        print(f"\nSaved enriched CSV -> {out_csv}")
-
-if __name__ == "__main__":
-    main()
-
+#!/usr/bin/env python3
+"""
+careerportal_enrich_by_year.py
+
+What it does:
+ - Computes targetYear = UTC_current_year - 1 (unless overridden by --year)
+ - Loads ./output/<year>/fortune500_<year>.csv (columns: rank,company_name)
+ - Queries DuckDuckGo to resolve a company's careers/jobs portal
+ - Caches results in ./output/<year>/ddg_cache.sqlite3
+ - Writes ./output/<year>/fortune500_<year>_with_careers.csv
+
+Usage:
+  # automatic (uses UTC now -> previous year)
+  python careerportal_enrich_by_year.py
+
+  # force a year
+  python careerportal_enrich_by_year.py --year 2024
+
+Requirements:
+  pip install ddgs requests
+"""
+
+import os
+import re
+import csv
+import atexit
+import string
+import argparse
+import functools
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+import numpy as np
+
+from kvcache import KVCache
+from ratelimit import TokenBucket
+
+# Try ddgs first, fallback to duckduckgo_search
+try:
+    from ddgs import DDGS
+except ImportError:
+    try:
+        from duckduckgo_search import DDGS
+    except ImportError:
+        DDGS = None
+
+# Config / tuning
+OUTPUT_ROOT = os.path.join(os.getcwd(), "output")
+DDG_BUCKET = TokenBucket(max_rate=5)  # real DDG calls per second; cache hits never wait
+MAX_RESULTS_PER_QUERY = 10
+PREFERRED_KEYWORDS = ("career", "careers", "job", "jobs", "vacancy", "join-us", "talent", "opportunities")
+# one compiled alternation replaces the per-keyword substring loop in scoring
+PREFERRED_RE = re.compile(r"\b(?:" + "|".join(re.escape(k) for k in PREFERRED_KEYWORDS) + r")\b", re.IGNORECASE)
+
+# Helpers: year logic
+def compute_target_year(now=None):
+    if now is None:
+        now = datetime.now(timezone.utc)
+    return now.year - 1
+
+def output_dir_for_year(year):
+    return os.path.join(OUTPUT_ROOT, str(year))
+
+def input_csv_for_year(year):
+    return os.path.join(output_dir_for_year(year), f"fortune500_{year}.csv")
+
+def cache_path_for_year(year):
+    return os.path.join(output_dir_for_year(year), "ddg_cache.sqlite3")
+
+def output_enriched_csv(year):
+    return os.path.join(output_dir_for_year(year), f"fortune500_{year}_with_careers.csv")
+
+# Company-name normalization so "Acme Ltd." / "acme  ltd" share a cache key
+_PUNCT_TABLE = str.maketrans("", "", string.punctuation)
+
+def norm_q(name):
+    return " ".join(name.casefold().translate(_PUNCT_TABLE).split())
+
+# DDG search wrappers
+# one long-lived client keeps its HTTP session warm across all queries
+_DDGS_CLIENT = None
+_DDGS_LOCK = threading.Lock()
+
+def _close_ddgs():
+    if _DDGS_CLIENT is not None:
+        try:
+            _DDGS_CLIENT.__exit__(None, None, None)
+        except Exception:
+            pass
+
+def _ddgs_client():
+    global _DDGS_CLIENT
+    with _DDGS_LOCK:
+        if _DDGS_CLIENT is None:
+            _DDGS_CLIENT = DDGS()
+            atexit.register(_close_ddgs)
+    return _DDGS_CLIENT
+
+@functools.lru_cache(maxsize=4096)
+def ddg_search_raw(query, max_results=MAX_RESULTS_PER_QUERY):
+    if DDGS is None:
+        raise RuntimeError("No DuckDuckGo client installed. Run: pip install ddgs")
+    DDG_BUCKET.acquire()  # rate-limit only the calls that actually hit the network
+    try:
+        return list(_ddgs_client().text(query, max_results=max_results))
+    except Exception as e:
+        print(f"[WARN] DuckDuckGo search failed for '{query}': {e}")
+        return []
+
+def normalize_href(r):
+    return (r.get("href") or r.get("url") or "").strip()
+
+# fast netloc extraction for scoring; urlparse allocates a ParseResult we don't need
+URL_RE = re.compile(r"^[a-z]+://([^/?#]+)", re.IGNORECASE)
+
+def netloc_of(url):
+    m = URL_RE.match(url)
+    if m:
+        return m.group(1).lower()
+    try:
+        return urlparse(url).netloc.lower()
+    except Exception:
+        return ""
+
+def score_and_pick_best(results, company_name):
+    if not results:
+        return ""
+    token = "".join(ch for ch in company_name if ch.isalnum()).lower()
+
+    # SoA layout: parallel lists plus one int32 score buffer instead of
+    # per-candidate tuple churn and a Python sort
+    idxs, hrefs, titles, netlocs = [], [], [], []
+    for idx, r in enumerate(results):
+        href = normalize_href(r)
+        if not href:
+            continue
+        idxs.append(idx)
+        hrefs.append(href)
+        titles.append((r.get("title") or "").lower())
+        netlocs.append(netloc_of(href))
+
+    if not hrefs:
+        return ""
+
+    n = len(hrefs)
+    scores = np.zeros(n, dtype=np.int32)
+
+    scores += np.fromiter(
+        (60 * len(set(PREFERRED_RE.findall(h)) | set(PREFERRED_RE.findall(t)))
+         for h, t in zip(hrefs, titles)),
+        dtype=np.int32, count=n)
+
+    if token:
+        scores += 30 * np.fromiter((token in nl for nl in netlocs), dtype=np.int32, count=n)
+
+    scores += 40 * np.fromiter(
+        (any(part in nl for part in ("careers.", "jobs.", "talent.")) for nl in netlocs),
+        dtype=np.int32, count=n)
+
+    social = np.fromiter(
+        (any(dom in nl for dom in ("wikipedia.org", "linkedin.com", "facebook.com")) for nl in netlocs),
+        dtype=bool, count=n)
+    scores[social] = 0  # Heavily penalize social/wiki sites
+
+    scores -= np.asarray(idxs, dtype=np.int32) * 2  # Prioritize higher-ranked results
+
+    best = int(scores.argmax())
+    return hrefs[best] if scores[best] > 0 else ""
+
+def find_career_link(company_name, cache):
+    key = norm_q(company_name) + "|careers"
+    if key in cache:
+        return cache[key]
+
+    results = ddg_search_raw(f"{company_name} careers site", max_results=MAX_RESULTS_PER_QUERY)
+    best = score_and_pick_best(results, company_name)
+
+    cache[key] = best or ""
+    return best or ""
+
+# Main pipeline
+def main():
+    parser = argparse.ArgumentParser(description="Enrich Fortune500 CSV with careers links (DuckDuckGo).")
+    parser.add_argument("--year", type=int, help="force year (overrides UTC-based target)")
+    args = parser.parse_args()
+
+    target_year = args.year or compute_target_year()
+    in_csv = input_csv_for_year(target_year)
+    out_csv = output_enriched_csv(target_year)
+    cache_file = cache_path_for_year(target_year)
+
+    print(f"Target Year: {target_year}")
+    print(f"Input CSV: {in_csv}")
+
+    if not os.path.exists(in_csv):
+        print(f"[ERR] Input CSV not found. Please run the annual scraper first.")
+        return
+
+    if not DDGS:
+        print("[ERR] No DuckDuckGo client found. Run: pip install ddgs")
+        return
+
+    # plain reader + positional indexing; no per-row dict churn
+    with open(in_csv, newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        header = next(reader, [])
+        col = {h: i for i, h in enumerate(header)}
+        name_idx = col.get("company_name")
+        rank_idx = col.get("rank")
+        companies = []
+        if name_idx is not None:
+            for row in reader:
+                if len(row) <= name_idx or not row[name_idx]:
+                    continue
+                rank = row[rank_idx] if rank_idx is not None and rank_idx < len(row) else ""
+                companies.append((rank, row[name_idx]))
+
+    cache = KVCache(cache_file)
+    cache.preload_keys()  # misses on reruns short-circuit without touching SQLite
+
+    # stream rows to disk as they resolve; an interrupt keeps everything written so far
+    os.makedirs(output_dir_for_year(target_year), exist_ok=True)
+    fh = open(out_csv, "w", newline="", encoding="utf-8", buffering=1)
+    writer = csv.writer(fh)
+    writer.writerow(["rank", "company_name", "careers_link"])
+
+    try:
+        for idx, (rank, name) in enumerate(companies, start=1):
+            print(f"[{idx}/{len(companies)}] Resolving: {name}")
+            link = find_career_link(name, cache)
+            print("  ->", link or "(no match)")
+            writer.writerow([rank, name, link])
+    except KeyboardInterrupt:
+        print("\nInterrupted. Rows written so far are on disk.")
+    finally:
+        cache.close()
+        fh.flush()
+        os.fsync(fh.fileno())
+        fh.close()
+        print(f"\nSaved enriched CSV -> {out_csv}")
+
+if __name__ == "__main__":
+    main()
+
@@ -12,13 +12,36 @@ Output:
 """
 
 import os
+import re
 import sys
 import json
 import csv
 import argparse
 from datetime import datetime, timezone
+import lxml.html
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Pooled session: reuses the TCP/TLS connection across page fetches instead of
+# paying a full handshake per requests.get call.
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+SESSION.headers.update({
+    "User-Agent": "Mozilla/5.0 (compatible; annual-fortune-scraper/1.0; +you@example.com)",
+    "Accept": "text/html,application/xhtml+xml",
+})
+
+# fallback row pattern: "<rank>. <company name>"
+ROW_RE = re.compile(r"^\s*(\d{1,3})[\.\s-]*\s+(.{2,200})$")
+MAX_COMPANIES = 500
 
 def compute_target_year(now=None):
     if now is None:
@@ -33,11 +56,7 @@ def already_processed(year):
     return os.path.exists(json_path)
 
 def fetch_html(url):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; annual-fortune-scraper/1.0; +you@example.com)",
-        "Accept": "text/html,application/xhtml+xml",
-    }
-    resp = requests.get(url, headers=headers, timeout=20)
+    resp = SESSION.get(url, timeout=20)
     resp.raise_for_status()
     return resp.text
 
@@ -45,7 +64,8 @@ def scrape_fortune_india_year(year):
     base = "https://www.fortuneindia.com"
     url = f"{base}/rankings/fortune-500/{year}"
     html = fetch_html(url)
-    soup = BeautifulSoup(html, "html.parser")
+    # the primary pass only needs anchors, so parse just those with lxml
+    soup = BeautifulSoup(html, "lxml", parse_only=SoupStrainer("a", href=True))
 
     companies = []
     seen = set()
@@ -62,12 +82,12 @@ def scrape_fortune_india_year(year):
         seen.add(key)
         companies.append({"rank": len(companies) + 1, "company_name": name})
 
-    # fallback: row/text scanning
+    # fallback: row/text scanning in a single lxml pass (no element list materialized)
     if not companies:
-        import re
-        for el in soup.find_all(["tr", "li", "div"]):
-            txt = " ".join(el.get_text(separator=" ").split()).strip()
-            m = re.match(r"^\s*(\d{1,3})[\.\s-]*\s+(.{2,200})$", txt)
+        tree = lxml.html.fromstring(html)
+        for el in tree.iter("tr", "li", "div"):
+            txt = " ".join(el.text_content().split())
+            m = ROW_RE.match(txt)
             if m:
                 rank = int(m.group(1))
                 name = m.group(2).strip()
@@ -75,6 +95,8 @@ def scrape_fortune_india_year(year):
                 if key not in seen:
                     seen.add(key)
                     companies.append({"rank": rank, "company_name": name})
+                    if len(companies) >= MAX_COMPANIES:
+                        break
 
     # normalize ranks to sequential order
     if companies:
@@ -1,382 +1,512 @@
-#!/usr/bin/env python3
-"""
-company_education_improved.py
-
-- Auto-targets previous UTC year (or use --year)
-- Reads ./output/<year>/fortune500_<year>.csv (rank,company_name)
-- Uses DuckDuckGo (ddgs preferred) to search and heuristically detect
-  whether the company offers official courses/training/roadmaps/events
-- Writes ./output/<year>/fortune500_<year>_education.csv
-- Caches results in ./output/<year>/edu_cache.json and ./output/<year>/content_cache.json
-"""
-
-import os
-import csv
-import json
-import time
-import argparse
-from datetime import datetime, timezone
-from urllib.parse import urlparse
-import requests
-from bs4 import BeautifulSoup
-
-# --- ddg client: ddgs preferred, fallback to duckduckgo_search ---
-DDGS = None
-provider = None
-try:
-    from ddgs import DDGS as _DDGS
-    DDGS = _DDGS
-    provider = "ddgs"
-except Exception:
-    try:
-        from duckduckgo_search import DDGS as _DDGS2
-        DDGS = _DDGS2
-        provider = "duckduckgo_search"
-    except Exception:
-        DDGS = None
-        provider = None
-
-# ---------- config ----------
-OUTPUT_ROOT = os.path.join(os.getcwd(), "output")
-DELAY = 0.18
-MAX_RESULTS = 10
-TOP_FETCH = 3  # fetch content for top N candidates
-FINAL_SCORE_THRESHOLD = 60  # >= => "Yes"
-MIN_CONTENT_KEYWORD_MATCHES = 1  # at least 1 matching content keyword
-
-# Keywords indicative of genuine learning/training resources
-EDU_KEYWORDS = (
-    "learn", "learning", "academy", "training", "course", "courses", "education",
-    "skill", "skills", "bootcamp", "certification", "certifications", "path", "roadmap",
-    "webinar", "workshop", "upskill", "upskilling", "developer", "developer training",
-    "learning path", "learning paths", "study", "curriculum", "program", "programs",
-)
-
-# Domains we treat as noisy / third-party (filter these unless domain contains company token)
-BLACKLIST_DOMAINS = (
-    "medium.com", "forbes.com", "timesofindia", "indiatoday", "ndtv.com", "googleusercontent.com",
-    "facebook.com", "linkedin.com", "twitter.com", "youtube.com", "reddit.com", "quora.com",
-    "wordpress.com", "blogspot.com", "glassdoor.com", "indeed.com", "jooble.org", "jobsite",
-    "news", "economictimes", "mint", "thehindu", "linkedin.", "razorpay.com"  # razorpay often shows tutorials
-)
-
-# explicit whitelist of learning subdomain patterns we trust (company-owned or common official platforms)
-TRUSTED_LEARNING_DOMAINS_PARTS = (
-    "academy", "learn", "learning", "skills", "cloudskillsboost", "training", "education", "developers", "campus", "university"
-)
-
-# ---------- helpers: paths & year logic ----------
-def compute_target_year(now=None):
-    if now is None:
-        now = datetime.now(timezone.utc)
-    return now.year - 1
-
-def output_dir_for_year(year):
-    return os.path.join(OUTPUT_ROOT, str(year))
-
-def input_csv_for_year(year):
-    return os.path.join(output_dir_for_year(year), f"fortune500_{year}.csv")
-
-def output_education_csv(year):
-    return os.path.join(output_dir_for_year(year), f"fortune500_{year}_education.csv")
-
-def cache_path_for_year(year):
-    return os.path.join(output_dir_for_year(year), "edu_cache.json")
-
-def content_cache_path_for_year(year):
-    return os.path.join(output_dir_for_year(year), "content_cache.json")
-
-# ---------- ddg search ----------
-def ddg_search(query, max_results=MAX_RESULTS):
-    if DDGS is None:
-        raise RuntimeError("No DuckDuckGo client found. Install ddgs or duckduckgo-search.")
-    try:
-        with DDGS() as ddgs:
-            return list(ddgs.text(query, max_results=max_results))
-    except Exception as e:
-        print(f"[WARN] DuckDuckGo search failed for '{query}': {e}")
-        return []
-
-def normalize_href(res):
-    return (res.get("href") or res.get("url") or "").strip()
-
-# ---------- scoring helpers ----------
-def domain_of(url):
-    try:
-        return urlparse(url).netloc.lower()
-    except Exception:
-        return ""
-
-def prelim_score_from_result(res, company_token):
-    href = normalize_href(res)
-    title = (res.get("title") or "").lower()
-    parsed = urlparse(href)
-    netloc = parsed.netloc.lower()
-    path = parsed.path.lower()
-    score = 0
-
-    # boost if any EDU keyword in title/path/url
-    for kw in EDU_KEYWORDS:
-        if kw in title or kw in path or kw in href.lower():
-            score += 40
-
-    # if domain contains company_token: likely official domain
-    if company_token and company_token in netloc:
-        score += 35
-
-    # domain has learning-specific part
-    if any(part in netloc for part in TRUSTED_LEARNING_DOMAINS_PARTS) or any(part in path for part in TRUSTED_LEARNING_DOMAINS_PARTS):
-        score += 45
-
-    # penalize known noisy sources
-    if any(b in netloc for b in BLACKLIST_DOMAINS) and (not (company_token and company_token in netloc)):
-        score -= 120
-
-    # small ordering bonus not applied here (we rank before fetching)
-    return score
-
-def fetch_page_text(url, content_cache, timeout=8):
-    if url in content_cache:
-        return content_cache[url]
-    try:
-        headers = {"User-Agent": "Mozilla/5.0 (compatible; edu-detector/1.0; +you@example.com)"}
-        r = requests.get(url, headers=headers, timeout=timeout)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        text = soup.get_text(separator=" ", strip=True).lower()
-    except Exception:
-        text = ""
-    # persist minimal snippet to cache
-    content_cache[url] = text
-    return text
-
-def content_score_for_text(text, company_token):
-    if not text:
-        return 0, 0
-    kw_matches = 0
-    for kw in EDU_KEYWORDS:
-        if kw in text:
-            kw_matches += 1
-    # company token presence (bonus)
-    token_match = 1 if (company_token and company_token in text) else 0
-    return kw_matches, token_match
-
-def final_score(prelim, kw_matches, token_match, netloc):
-    # content contribution: each keyword match * 18
-    score = prelim + (kw_matches * 18) + (token_match * 20)
-    # extra boost if netloc explicitly contains learning/zones
-    if any(part in netloc for part in TRUSTED_LEARNING_DOMAINS_PARTS):
-        score += 15
-    # cap lower bound
-    return score
-
-# ---------- main detection per company ----------
-def find_education_for_company(company_name, year, cache, content_cache):
-    q = f"{company_name} learning academy training courses 'learning path' webinar workshop"
-    if q in cache:
-        return cache[q]
-
-    # Prepare company token (simple heuristic)
-    token = "".join(ch if ch.isalnum() or ch.isspace() else " " for ch in company_name).lower().split()
-    company_token = token[0] if token else ""
-
-    results = ddg_search(q, max_results=MAX_RESULTS)
-    if not results:
-        cache[q] = {"offers": "No", "link": "", "title": "", "score": 0, "reason": "no_search_results"}
-        return cache[q]
-
-    # compute prelim scores
-    prelim_list = []
-    for idx, r in enumerate(results):
-        href = normalize_href(r)
-        if not href:
-            continue
-        netloc = domain_of(href)
-        prelim = prelim_score_from_result(r, company_token)
-        prelim_list.append((prelim, idx, href, r.get("title") or "", netloc))
-
-    if not prelim_list:
-        cache[q] = {"offers": "No", "link": "", "title": "", "score": 0, "reason": "no_candidates"}
-        return cache[q]
-
-    # rank by prelim and pick top N to fetch content
-    prelim_list.sort(key=lambda x: x[0], reverse=True)
-    top_candidates = prelim_list[:TOP_FETCH]
-
-    scored_candidates = []
-    for prelim, idx, href, title, netloc in top_candidates:
-        # fetch text (cached)
-        text = fetch_page_text(href, content_cache)
-        kw_matches, token_match = content_score_for_text(text, company_token)
-        final = final_score(prelim, kw_matches, token_match, netloc)
-        scored_candidates.append((final, prelim, kw_matches, token_match, href, title, netloc))
-
-    # If none of top candidates gave strong signals, optionally check the top-most result's domain-specific search
-    if not scored_candidates or max(c[0] for c in scored_candidates) < 30:
-        # domain-specific fallback using domain from first search result
-        first_href = normalize_href(results[0])
-        first_domain = domain_of(first_href)
-        if first_domain:
-            # search site:first_domain careers
-            fallback_q = f"site:{first_domain} careers OR training OR academy OR learn"
-            fb_results = ddg_search(fallback_q, max_results=6)
-            for r in fb_results:
-                href = normalize_href(r)
-                if not href:
-                    continue
-                netloc = domain_of(href)
-                text = fetch_page_text(href, content_cache)
-                kw_matches, token_match = content_score_for_text(text, company_token)
-                prelim = prelim_score_from_result(r, company_token)
-                final = final_score(prelim, kw_matches, token_match, netloc)
-                scored_candidates.append((final, prelim, kw_matches, token_match, href, r.get("title") or "", netloc))
-
-    if not scored_candidates:
-        cache[q] = {"offers": "No", "link": "", "title": "", "score": 0, "reason": "no_scored"}
-        return cache[q]
-
-    # pick best candidate
-    scored_candidates.sort(key=lambda x: x[0], reverse=True)
-    best = scored_candidates[0]
-    best_score, best_prelim, best_kw_matches, best_token_match, best_href, best_title, best_netloc = best
-
-    reason = []
-    if best_token_match:
-        reason.append("company_token_in_content")
-    if best_kw_matches:
-        reason.append(f"content_kw_matches={best_kw_matches}")
-    if "academy" in best_netloc or "learn" in best_netloc or "skills" in best_netloc:
-        reason.append("domain_edu_keyword")
-
-    # blacklist safety: if domain blacklisted and company token not in domain -> reject unless very high score
-    if any(b in best_netloc for b in BLACKLIST_DOMAINS) and (not (company_token and company_token in best_netloc)):
-        if best_score < 80:
-            cache[q] = {"offers": "No", "link": "", "title": "", "score": best_score, "reason": "blacklisted_domain_low_score"}
-            return cache[q]
-        else:
-            reason.append("override_blacklist_by_score")
-
-    offers = "Yes" if (best_score >= FINAL_SCORE_THRESHOLD and best_kw_matches >= MIN_CONTENT_KEYWORD_MATCHES) or (best_token_match and best_kw_matches >= 1) else "No"
-
-    out = {
-        "offers": offers,
-        "link": best_href,
-        "title": best_title,
-        "score": int(best_score),
-        "reason": ";".join(reason) if reason else "scored_candidate"
-    }
-    cache[q] = out
-    return out
-
-# ---------- pipeline ----------
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--year", type=int, help="force year (defaults to UTC now - 1)")
-    parser.add_argument("--only-yes", action="store_true", help="write only rows with offers_education=Yes")
-    args = parser.parse_args()
-
-    target_year = args.year or compute_target_year()
-    input_csv = input_csv_for_year(target_year)
-    out_csv = output_education_csv(target_year)
-    cache_file = cache_path_for_year(target_year)
-    content_cache_file = content_cache_path_for_year(target_year)
-
-    print(f"Provider: {provider or 'none installed'} | targetYear={target_year}")
-    print(f"Input CSV: {input_csv}")
-
-    if not os.path.exists(input_csv):
-        print(f"[ERR] Input CSV missing: {input_csv}")
-        return
-
-    if DDGS is None:
-        print("[ERR] DuckDuckGo client not installed. pip install ddgs requests")
-        return
-
-    # load CSV
-    companies = []
-    with open(input_csv, newline="", encoding="utf-8") as fh:
-        reader = csv.DictReader(fh)
-        for row in reader:
-            name = row.get("company_name") or row.get("Company") or row.get("name")
-            rank = row.get("rank") or ""
-            if name:
-                companies.append({"rank": rank, "company_name": name.strip()})
-
-    if not companies:
-        print("[ERR] No rows in CSV.")
-        return
-
-    # load caches
-    cache = {}
-    content_cache = {}
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file, "r", encoding="utf-8") as fh:
-                cache = json.load(fh)
-        except Exception:
-            cache = {}
-    if os.path.exists(content_cache_file):
-        try:
-            with open(content_cache_file, "r", encoding="utf-8") as fh:
-                content_cache = json.load(fh)
-        except Exception:
-            content_cache = {}
-
-    results = []
-    for idx, comp in enumerate(companies, start=1):
-        name = comp["company_name"]
-        rank = comp.get("rank", "")
-        print(f"[{idx}/{len(companies)}] {name}")
-        try:
-            info = find_education_for_company(name, target_year, cache, content_cache)
-        except Exception as e:
-            print(f"  [ERR] search failed: {e}")
-            info = {"offers": "No", "link": "", "title": "", "score": 0, "reason": "error"}
-
-        print(f"   -> Offers: {info['offers']} | score={info.get('score')} | link={info.get('link') or '(none)'} | reason={info.get('reason')}")
-        row = {
-            "rank": rank,
-            "company_name": name,
-            "offers_education": info["offers"],
-            "detected_link": info.get("link", ""),
-            "detected_title": info.get("title", ""),
-            "score": info.get("score", 0),
-            "reason": info.get("reason", "")
-        }
-        if args.only_yes and info["offers"] != "Yes":
-            # skip
-            pass
-        else:
-            results.append(row)
-
-        # periodic cache flush
-        if idx % 20 == 0:
-            os.makedirs(output_dir_for_year(target_year), exist_ok=True)
-            with open(cache_file, "w", encoding="utf-8") as fh:
-                json.dump(cache, fh, ensure_ascii=False, indent=2)
-            with open(content_cache_file, "w", encoding="utf-8") as fh:
-                json.dump(content_cache, fh, ensure_ascii=False, indent=2)
-
-        time.sleep(DELAY)
-
-    # final persist
-    os.makedirs(output_dir_for_year(target_year), exist_ok=True)
-    with open(cache_file, "w", encoding="utf-8") as fh:
-        json.dump(cache, fh, ensure_ascii=False, indent=2)
-    with open(content_cache_file, "w", encoding="utf-8") as fh:
-        json.dump(content_cache, fh, ensure_ascii=False, indent=2)
-
-    # write CSV
-    with open(out_csv, "w", newline="", encoding="utf-8") as fh:
-        fieldnames = ["rank","company_name","offers_education","detected_link","detected_title","score","reason"]
-        writer = csv.DictWriter(fh, fieldnames=fieldnames)
-        writer.writeheader()
-        for r in results:
-            writer.writerow(r)
-
-    print(f"Saved enriched CSV -> {out_csv}")
-    print(f"Saved cache -> {cache_file}")
-    print(f"Saved content cache -> {content_cache_file}")
-
-if __name__ == "__main__":
-    main()
+#!/usr/bin/env python3
+"""
+company_education_improved.py
+
+- Auto-targets previous UTC year (or use --year)
+- Reads ./output/<year>/fortune500_<year>.csv (rank,company_name)
+- Uses DuckDuckGo (ddgs preferred) to search and heuristically detect
+  whether the company offers official courses/training/roadmaps/events
+- Fetches candidate pages concurrently via aiohttp (bounded semaphore)
+- Writes ./output/<year>/fortune500_<year>_education.csv
+- Caches results in ./output/<year>/edu_cache.sqlite3 and ./output/<year>/content_cache/ (gzip blobs)
+"""
+
+import os
+import re
+import csv
+import atexit
+import string
+import asyncio
+import argparse
+import functools
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+import aiohttp
+import numpy as np
+from bs4 import BeautifulSoup, SoupStrainer
+from kvcache import DeadURLSet, FileCache, KVCache
+from ratelimit import TokenBucket
+
+# --- ddg client: ddgs preferred, fallback to duckduckgo_search ---
+DDGS = None
+provider = None
+try:
+    from ddgs import DDGS as _DDGS
+    DDGS = _DDGS
+    provider = "ddgs"
+except Exception:
+    try:
+        from duckduckgo_search import DDGS as _DDGS2
+        DDGS = _DDGS2
+        provider = "duckduckgo_search"
+    except Exception:
+        DDGS = None
+        provider = None
+
+# ---------- config ----------
+OUTPUT_ROOT = os.path.join(os.getcwd(), "output")
+DDG_BUCKET = TokenBucket(max_rate=5)  # real DDG calls per second; cache hits never wait
+MAX_RESULTS = 10
+TOP_FETCH = 3  # fetch content for top N candidates
+FINAL_SCORE_THRESHOLD = 60  # >= => "Yes"
+HIGH_CONFIDENCE = FINAL_SCORE_THRESHOLD * 2  # prelim alone decides; skip content fetches
+MIN_CONTENT_KEYWORD_MATCHES = 1  # at least 1 matching content keyword
+CONCURRENCY = 20  # max companies in flight at once
+MAX_PAGE_BYTES = 512 * 1024  # stop reading a page body beyond this
+MAX_CACHED_TEXT = 8 * 1024  # scoring only needs keyword hits, not the full page
+DEAD_STATUSES = frozenset({403, 404, 410, 451})  # permanent failures worth remembering
+UA_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; edu-detector/1.0; +you@example.com)"}
+
+# Keywords indicative of genuine learning/training resources
+EDU_KEYWORDS = (
+    "learn", "learning", "academy", "training", "course", "courses", "education",
+    "skill", "skills", "bootcamp", "certification", "certifications", "path", "roadmap",
+    "webinar", "workshop", "upskill", "upskilling", "developer", "developer training",
+    "learning path", "learning paths", "study", "curriculum", "program", "programs",
+)
+
+# single compiled alternation so keyword scans run in one C-level pass
+# instead of K substring searches per string
+EDU_RE = re.compile(r"\b(?:" + "|".join(re.escape(k) for k in EDU_KEYWORDS) + r")\b", re.IGNORECASE)
+
+# Domains we treat as noisy / third-party (filter these unless domain contains company token)
+BLACKLIST_DOMAINS = (
+    "medium.com", "forbes.com", "timesofindia", "indiatoday", "ndtv.com", "googleusercontent.com",
+    "facebook.com", "linkedin.com", "twitter.com", "youtube.com", "reddit.com", "quora.com",
+    "wordpress.com", "blogspot.com", "glassdoor.com", "indeed.com", "jooble.org", "jobsite",
+    "news", "economictimes", "mint", "thehindu", "linkedin.", "razorpay.com"  # razorpay often shows tutorials
+)
+
+BLACKLIST_SET = frozenset(BLACKLIST_DOMAINS)
+
+# explicit whitelist of learning subdomain patterns we trust (company-owned or common official platforms)
+TRUSTED_LEARNING_DOMAINS_PARTS = (
+    "academy", "learn", "learning", "skills", "cloudskillsboost", "training", "education", "developers", "campus", "university"
+)
+
+# ---------- helpers: paths & year logic ----------
+def compute_target_year(now=None):
+    if now is None:
+        now = datetime.now(timezone.utc)
+    return now.year - 1
+
+def output_dir_for_year(year):
+    return os.path.join(OUTPUT_ROOT, str(year))
+
+def input_csv_for_year(year):
+    return os.path.join(output_dir_for_year(year), f"fortune500_{year}.csv")
+
+def output_education_csv(year):
+    return os.path.join(output_dir_for_year(year), f"fortune500_{year}_education.csv")
+
+def cache_path_for_year(year):
+    return os.path.join(output_dir_for_year(year), "edu_cache.sqlite3")
+
+def content_cache_path_for_year(year):
+    return os.path.join(output_dir_for_year(year), "content_cache")
+
+def dead_urls_path_for_year(year):
+    return os.path.join(output_dir_for_year(year), "dead_urls.txt")
+
+# ---------- query normalization ----------
+# "Acme Ltd." / "acme  ltd" collapse to one cache key, killing duplicate searches
+_PUNCT_TABLE = str.maketrans("", "", string.punctuation)
+
+def norm_q(name):
+    return " ".join(name.casefold().translate(_PUNCT_TABLE).split())
+
+# ---------- ddg search ----------
+# one long-lived client keeps its HTTP session (and connection pool) warm
+# across all queries instead of a TLS handshake per search
+_DDGS_CLIENT = None
+_DDGS_LOCK = threading.Lock()
+
+def _close_ddgs():
+    if _DDGS_CLIENT is not None:
+        try:
+            _DDGS_CLIENT.__exit__(None, None, None)
+        except Exception:
+            pass
+
+def _ddgs_client():
+    global _DDGS_CLIENT
+    with _DDGS_LOCK:
+        if _DDGS_CLIENT is None:
+            _DDGS_CLIENT = DDGS()
+            atexit.register(_close_ddgs)
+    return _DDGS_CLIENT
+
+@functools.lru_cache(maxsize=4096)
+def ddg_search(query, max_results=MAX_RESULTS):
+    if DDGS is None:
+        raise RuntimeError("No DuckDuckGo client found. Install ddgs or duckduckgo-search.")
+    # rate-limit only real network calls; lru_cache hits return before this
+    DDG_BUCKET.acquire()
+    try:
+        return list(_ddgs_client().text(query, max_results=max_results))
+    except Exception as e:
+        print(f"[WARN] DuckDuckGo search failed for '{query}': {e}")
+        return []
+
+async def ddg_search_async(query, max_results=MAX_RESULTS):
+    # the ddgs client is synchronous; run it in the default thread pool
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, ddg_search, query, max_results)
+
+def normalize_href(res):
+    return (res.get("href") or res.get("url") or "").strip()
+
+# ---------- scoring helpers ----------
+# fast netloc/path extraction; urlparse allocates a ParseResult and does
+# multi-stage splitting we don't need in the scoring hot loop
+URL_RE = re.compile(r"^[a-z]+://([^/?#]+)(/[^?#]*)?", re.IGNORECASE)
+
+def split_url(url):
+    m = URL_RE.match(url)
+    if m:
+        return m.group(1).lower(), (m.group(2) or "").lower()
+    try:
+        parsed = urlparse(url)
+        return parsed.netloc.lower(), parsed.path.lower()
+    except Exception:
+        return "", ""
+
+def domain_of(url):
+    return split_url(url)[0]
+
+def prelim_score_from_result(res, company_token):
+    href = normalize_href(res)
+    title = (res.get("title") or "").lower()
+    netloc, path = split_url(href)
+    score = 0
+
+    # boost per distinct EDU keyword found in title/path/url
+    kw_hits = set(EDU_RE.findall(title))
+    kw_hits.update(EDU_RE.findall(path))
+    kw_hits.update(EDU_RE.findall(href.lower()))
+    score += 40 * len(kw_hits)
+
+    # if domain contains company_token: likely official domain
+    if company_token and company_token in netloc:
+        score += 35
+
+    # domain has learning-specific part
+    if any(part in netloc for part in TRUSTED_LEARNING_DOMAINS_PARTS) or any(part in path for part in TRUSTED_LEARNING_DOMAINS_PARTS):
+        score += 45
+
+    # penalize known noisy sources
+    if any(b in netloc for b in BLACKLIST_SET) and (not (company_token and company_token in netloc)):
+        score -= 120
+
+    # small ordering bonus not applied here (we rank before fetching)
+    return score
+
+async def fetch_page_html(session, url, dead_urls):
+    """I/O half of a candidate fetch: raw (capped) HTML, or None on failure."""
+    if url in dead_urls:
+        return None
+    try:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=8)) as r:
+            r.raise_for_status()
+            ctype = r.headers.get("Content-Type", "")
+            if not ctype.startswith(("text/html", "application/xhtml")):
+                return None
+            # stream at most MAX_PAGE_BYTES instead of buffering arbitrary bodies
+            chunks = []
+            read = 0
+            async for chunk in r.content.iter_chunked(65536):
+                chunks.append(chunk)
+                read += len(chunk)
+                if read >= MAX_PAGE_BYTES:
+                    break
+            return b"".join(chunks).decode(r.charset or "utf-8", errors="ignore")
+    except aiohttp.ClientResponseError as e:
+        if e.status in DEAD_STATUSES:
+            dead_urls.add(url)
+        return None
+    except Exception:
+        # connect failures / timeouts: remember so re-crawls skip the attempt
+        dead_urls.add(url)
+        return None
+
+def process_candidate(raw_html, company_token):
+    """CPU half: parse + extract + score. Pure, so it can run in a worker process."""
+    # lxml parses ~10x faster than html.parser; we only need the <body> text
+    soup = BeautifulSoup(raw_html, "lxml", parse_only=SoupStrainer("body"))
+    text = soup.get_text(separator=" ", strip=True).lower()[:MAX_CACHED_TEXT]
+    kw_matches, token_match = content_score_for_text(text, company_token)
+    return text, kw_matches, token_match
+
+async def fetch_and_score(session, url, company_token, content_cache, dead_urls, pool):
+    text = content_cache.get(url)
+    if text is not None:
+        return content_score_for_text(text, company_token)
+    raw_html = await fetch_page_html(session, url, dead_urls)
+    if not raw_html:
+        return 0, 0
+    # parsing and scoring are GIL-bound; fan them out across cores
+    loop = asyncio.get_running_loop()
+    text, kw_matches, token_match = await loop.run_in_executor(
+        pool, process_candidate, raw_html, company_token)
+    # persist minimal snippet to cache
+    content_cache[url] = text
+    return kw_matches, token_match
+
+def content_score_for_text(text, company_token):
+    if not text:
+        return 0, 0
+    # count distinct keywords in one regex pass over the page text
+    kw_matches = len(set(EDU_RE.findall(text)))
+    # company token presence (bonus)
+    token_match = 1 if (company_token and company_token in text) else 0
+    return kw_matches, token_match
+
+def final_score(prelim, kw_matches, token_match, netloc):
+    # content contribution: each keyword match * 18
+    score = prelim + (kw_matches * 18) + (token_match * 20)
+    # extra boost if netloc explicitly contains learning/zones
+    if any(part in netloc for part in TRUSTED_LEARNING_DOMAINS_PARTS):
+        score += 15
+    # cap lower bound
+    return score
+
+# ---------- main detection per company ----------
+async def find_education_for_company(session, company_name, year, cache, content_cache, dead_urls, pool):
+    q = f"{company_name} learning academy training courses 'learning path' webinar workshop"
+    key = norm_q(company_name) + "|education"
+    if key in cache:
+        return cache[key]
+
+    # Prepare company token (simple heuristic)
+    token = "".join(ch if ch.isalnum() or ch.isspace() else " " for ch in company_name).lower().split()
+    company_token = token[0] if token else ""
+
+    results = await ddg_search_async(q, max_results=MAX_RESULTS)
+    if not results:
+        cache[key] = {"offers": "No", "link": "", "title": "", "score": 0, "reason": "no_search_results"}
+        return cache[key]
+
+    # compute prelim scores into parallel arrays (SoA) and rank via argsort
+    kept = [r for r in results if normalize_href(r)]
+    if not kept:
+        cache[key] = {"offers": "No", "link": "", "title": "", "score": 0, "reason": "no_candidates"}
+        return cache[key]
+
+    hrefs = [normalize_href(r) for r in kept]
+    titles = [r.get("title") or "" for r in kept]
+    netlocs = [domain_of(h) for h in hrefs]
+    prelims = np.fromiter(
+        (prelim_score_from_result(r, company_token) for r in kept),
+        dtype=np.int32, count=len(kept))
+
+    # rank by prelim and pick top N to fetch content
+    order = np.argsort(-prelims, kind="stable")
+    top_candidates = [
+        (int(prelims[i]), int(i), hrefs[i], titles[i], netlocs[i])
+        for i in order[:TOP_FETCH]
+    ]
+
+    # high-confidence prelim (e.g. academy subdomain + company token) decides
+    # outright — no content fetches needed
+    top_prelim, _, top_href, top_title, top_netloc = top_candidates[0]
+    if top_prelim >= HIGH_CONFIDENCE:
+        out = {
+            "offers": "Yes",
+            "link": top_href,
+            "title": top_title,
+            "score": int(top_prelim),
+            "reason": "prelim_high_confidence",
+        }
+        cache[key] = out
+        return out
+
+    scored_candidates = []
+    for prelim, idx, href, title, netloc in top_candidates:
+        # fetch (cached) + parse/score in the worker pool
+        kw_matches, token_match = await fetch_and_score(session, href, company_token, content_cache, dead_urls, pool)
+        final = final_score(prelim, kw_matches, token_match, netloc)
+        scored_candidates.append((final, prelim, kw_matches, token_match, href, title, netloc))
+        # candidate already clears the bar: skip fetching the rest
+        if final >= FINAL_SCORE_THRESHOLD and kw_matches >= MIN_CONTENT_KEYWORD_MATCHES:
+            break
+
+    # If none of top candidates gave strong signals, optionally check the top-most result's domain-specific search
+    if not scored_candidates or max(c[0] for c in scored_candidates) < 30:
+        # domain-specific fallback using domain from first search result
+        first_href = normalize_href(results[0])
+        first_domain = domain_of(first_href)
+        if first_domain:
+            # search site:first_domain careers
+            fallback_q = f"site:{first_domain} careers OR training OR academy OR learn"
+            fb_results = await ddg_search_async(fallback_q, max_results=6)
+            for r in fb_results:
+                href = normalize_href(r)
+                if not href:
+                    continue
+                netloc = domain_of(href)
+                kw_matches, token_match = await fetch_and_score(session, href, company_token, content_cache, dead_urls, pool)
+                prelim = prelim_score_from_result(r, company_token)
+                final = final_score(prelim, kw_matches, token_match, netloc)
+                scored_candidates.append((final, prelim, kw_matches, token_match, href, r.get("title") or "", netloc))
+
+    if not scored_candidates:
+        cache[key] = {"offers": "No", "link": "", "title": "", "score": 0, "reason": "no_scored"}
+        return cache[key]
+
+    # pick best candidate
+    scored_candidates.sort(key=lambda x: x[0], reverse=True)
+    best = scored_candidates[0]
+    best_score, best_prelim, best_kw_matches, best_token_match, best_href, best_title, best_netloc = best
+
+    reason = []
+    if best_token_match:
+        reason.append("company_token_in_content")
+    if best_kw_matches:
+        reason.append(f"content_kw_matches={best_kw_matches}")
+    if "academy" in best_netloc or "learn" in best_netloc or "skills" in best_netloc:
+        reason.append("domain_edu_keyword")
+
+    # blacklist safety: if domain blacklisted and company token not in domain -> reject unless very high score
+    if any(b in best_netloc for b in BLACKLIST_SET) and (not (company_token and company_token in best_netloc)):
+        if best_score < 80:
+            cache[key] = {"offers": "No", "link": "", "title": "", "score": best_score, "reason": "blacklisted_domain_low_score"}
+            return cache[key]
+        else:
+            reason.append("override_blacklist_by_score")
+
+    offers = "Yes" if (best_score >= FINAL_SCORE_THRESHOLD and best_kw_matches >= MIN_CONTENT_KEYWORD_MATCHES) or (best_token_match and best_kw_matches >= 1) else "No"
+
+    out = {
+        "offers": offers,
+        "link": best_href,
+        "title": best_title,
+        "score": int(best_score),
+        "reason": ";".join(reason) if reason else "scored_candidate"
+    }
+    cache[key] = out
+    return out
+
+# ---------- pipeline ----------
+async def process_company(sem, session, idx, total, comp, year, cache, content_cache, dead_urls, pool):
+    rank, name = comp
+    async with sem:
+        print(f"[{idx}/{total}] {name}")
+        try:
+            info = await find_education_for_company(session, name, year, cache, content_cache, dead_urls, pool)
+        except Exception as e:
+            print(f"  [ERR] search failed: {e}")
+            info = {"offers": "No", "link": "", "title": "", "score": 0, "reason": "error"}
+
+    print(f"   -> Offers: {info['offers']} | score={info.get('score')} | link={info.get('link') or '(none)'} | reason={info.get('reason')}")
+    return idx, [
+        rank,
+        name,
+        info["offers"],
+        info.get("link", ""),
+        info.get("title", ""),
+        info.get("score", 0),
+        info.get("reason", ""),
+    ]
+
+async def main_async(companies, target_year, cache, content_cache, dead_urls, pool, writer, only_yes):
+    sem = asyncio.BoundedSemaphore(CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit=64, limit_per_host=8, ssl=False)
+    async with aiohttp.ClientSession(connector=connector, headers=UA_HEADERS) as session:
+        tasks = [
+            asyncio.ensure_future(
+                process_company(sem, session, idx, len(companies), comp, target_year, cache, content_cache, dead_urls, pool)
+            )
+            for idx, comp in enumerate(companies, start=1)
+        ]
+        # stream each finished row to disk; buffer only out-of-order completions
+        # so the CSV keeps input order
+        done_rows = {}
+        next_write = 1
+        for coro in asyncio.as_completed(tasks):
+            idx, row = await coro
+            done_rows[idx] = row
+            while next_write in done_rows:
+                r = done_rows.pop(next_write)
+                if not only_yes or r[2] == "Yes":  # r[2] = offers_education
+                    writer.writerow(r)
+                next_write += 1
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--year", type=int, help="force year (defaults to UTC now - 1)")
+    parser.add_argument("--only-yes", action="store_true", help="write only rows with offers_education=Yes")
+    args = parser.parse_args()
+
+    target_year = args.year or compute_target_year()
+    input_csv = input_csv_for_year(target_year)
+    out_csv = output_education_csv(target_year)
+    cache_file = cache_path_for_year(target_year)
+    content_cache_file = content_cache_path_for_year(target_year)
+
+    print(f"Provider: {provider or 'none installed'} | targetYear={target_year}")
+    print(f"Input CSV: {input_csv}")
+
+    if not os.path.exists(input_csv):
+        print(f"[ERR] Input CSV missing: {input_csv}")
+        return
+
+    if DDGS is None:
+        print("[ERR] DuckDuckGo client not installed. pip install ddgs requests")
+        return
+
+    # load CSV (plain reader + positional indexing; no per-row dict churn)
+    companies = []
+    with open(input_csv, newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        header = next(reader, [])
+        col = {h: i for i, h in enumerate(header)}
+        name_idx = next((col[h] for h in ("company_name", "Company", "name") if h in col), None)
+        rank_idx = col.get("rank")
+        if name_idx is not None:
+            for row in reader:
+                if len(row) <= name_idx or not row[name_idx]:
+                    continue
+                rank = row[rank_idx] if rank_idx is not None and rank_idx < len(row) else ""
+                companies.append((rank, row[name_idx].strip()))
+
+    if not companies:
+        print("[ERR] No rows in CSV.")
+        return
+
+    # open caches; every write is persisted immediately. Page text goes to
+    # per-URL gzip blobs so one entry never rewrites the others.
+    cache = KVCache(cache_file)
+    cache.preload_keys()  # reruns check misses against an in-memory set
+    content_cache = FileCache(content_cache_file)
+    dead_urls = DeadURLSet(dead_urls_path_for_year(target_year))
+
+    # open the output up front and stream rows as companies finish; an
+    # interrupt or crash keeps everything written so far
+    os.makedirs(output_dir_for_year(target_year), exist_ok=True)
+    fh = open(out_csv, "w", newline="", encoding="utf-8", buffering=1)
+    writer = csv.writer(fh)
+    writer.writerow(["rank","company_name","offers_education","detected_link","detected_title","score","reason"])
+
+    # one worker pool for the CPU-bound parse+score stage, shared by all tasks
+    pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    try:
+        asyncio.run(main_async(companies, target_year, cache, content_cache, dead_urls, pool, writer, args.only_yes))
+    except KeyboardInterrupt:
+        print("\nInterrupted. Rows written so far are on disk.")
+    finally:
+        pool.shutdown()
+        dead_urls.flush()
+        cache.close()
+        content_cache.close()
+        fh.flush()
+        os.fsync(fh.fileno())
+        fh.close()
+
+    print(f"Saved enriched CSV -> {out_csv}")
+    print(f"Saved cache -> {cache_file}")
+    print(f"Saved content cache -> {content_cache_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+kvcache.py
+
+SQLite-backed key/value cache shared by the scraper scripts.
+
+Replaces the old "load the whole JSON blob / rewrite the whole JSON blob"
+cache pattern: every set() is an O(1) upsert, every get() a point lookup,
+and nothing needs to be held in RAM between lookups. Values are stored
+JSON-serialized, so anything the old caches held (strings, dicts) round-trips
+unchanged. A fetched_at column is kept per row for future TTL eviction.
+"""
+
+import os
+import gzip
+import json
+import time
+import sqlite3
+import hashlib
+
+# orjson serializes ~5-10x faster than stdlib json; fall back if not installed
+try:
+    import orjson
+
+    def _dumps(value):
+        return orjson.dumps(value).decode("utf-8")
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(value):
+        return json.dumps(value, ensure_ascii=False)
+
+    _loads = json.loads
+
+
+class KVCache:
+    """Dict-like persistent cache backed by a single SQLite table."""
+
+    def __init__(self, path):
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT, fetched_at INTEGER)"
+        )
+        self._known = None  # optional in-memory key set, see preload_keys()
+
+    def preload_keys(self):
+        """Load all keys into an in-memory set so misses short-circuit without a query."""
+        self._known = {row[0] for row in self._conn.execute("SELECT key FROM kv")}
+
+    def get(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM kv WHERE key=?", (key,)).fetchone()
+        if row is None:
+            return default
+        return _loads(row[0])
+
+    def set(self, key, value):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, fetched_at) VALUES (?, ?, ?)",
+            (key, _dumps(value), int(time.time())),
+        )
+        if self._known is not None:
+            self._known.add(key)
+
+    def keys(self):
+        return [row[0] for row in self._conn.execute("SELECT key FROM kv")]
+
+    def __contains__(self, key):
+        if self._known is not None:
+            return key in self._known
+        row = self._conn.execute("SELECT 1 FROM kv WHERE key=?", (key,)).fetchone()
+        return row is not None
+
+    def __getitem__(self, key):
+        row = self._conn.execute("SELECT value FROM kv WHERE key=?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return _loads(row[0])
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+class FileCache:
+    """Dict-like text cache: one gzip blob per key under root/<sha1[:2]>/<sha1>.txt.gz.
+
+    Suited to large page-text entries: each write touches only its own
+    small compressed file (O(1) per entry, ~5-10x smaller on disk), and
+    nothing is ever loaded into RAM besides the entry being read.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        h = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, h[:2], h + ".txt.gz")
+
+    def get(self, key, default=None):
+        try:
+            with gzip.open(self._path(key), "rt", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return default
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path, "wt", compresslevel=3, encoding="utf-8") as f:
+            f.write(value)
+
+    def close(self):
+        pass  # nothing held open; kept for interface parity with KVCache
+
+
+class DeadURLSet:
+    """Persistent set of URLs that previously failed hard (404s, dead hosts).
+
+    Lets re-crawls skip the DNS+TCP+TLS attempt entirely. Stored as one
+    sha1 hash per line; new entries are appended every flush_every adds
+    and on flush(), so a crash loses at most a handful of markers.
+    """
+
+    def __init__(self, path, flush_every=50):
+        self.path = path
+        self.flush_every = flush_every
+        self._hashes = set()
+        self._pending = []
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._hashes = {line.strip() for line in f if line.strip()}
+        except OSError:
+            pass
+
+    @staticmethod
+    def _hash(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def __contains__(self, url):
+        return self._hash(url) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add(self, url):
+        h = self._hash(url)
+        if h in self._hashes:
+            return
+        self._hashes.add(h)
+        self._pending.append(h)
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self._pending) + "\n")
+        self._pending = []
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+ratelimit.py
+
+Token-bucket rate limiter shared by the scraper scripts.
+
+The old pipelines slept a fixed delay after every company, including pure
+cache hits that performed no network I/O. A token bucket only blocks when
+real requests would exceed the allowed rate, and permits bursts up to the
+bucket capacity, so cache-heavy reruns no longer pay N x DELAY of dead time.
+"""
+
+import time
+import threading
+
+
+class TokenBucket:
+    """Thread-safe token bucket: acquire() sleeps only when the rate is exceeded."""
+
+    def __init__(self, max_rate, capacity=None):
+        self.max_rate = float(max_rate)  # tokens refilled per second
+        self.capacity = float(capacity if capacity is not None else max_rate)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.max_rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.max_rate
+            time.sleep(wait)